@@ -37,8 +37,15 @@ COUNCIL_MODELS = [
     "copilot/o4-mini",
 ]
 
+# Overall deadline (seconds) for a parallel council stage; slower models are
+# dropped so one straggler can't hold up the whole stage
+COUNCIL_STAGE_TIMEOUT = 100.0
+
 # Chairman model - synthesizes final response
 CHAIRMAN_MODEL = "copilot/gpt-4o"
 
 # Data directory for conversation storage
 DATA_DIR = "data/conversations"
+
+# SQLite index of conversation metadata (id, created_at, title, message_count)
+INDEX_DB_PATH = "data/index.sqlite"
@@ -1,12 +1,19 @@
 """GitHub Copilot API client for making LLM requests."""
 
 import os
+import json
+import time
+import logging
 import httpx
 import asyncio
 import base64
+import functools
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from cryptography.fernet import Fernet
+from .http_client import get_http_client
+
+logger = logging.getLogger(__name__)
 
 # Copilot OAuth Configuration
 COPILOT_CLIENT_ID = "Iv1.b507a08c87ecfe98"
@@ -15,6 +22,22 @@ GITHUB_ACCESS_TOKEN_URL = "https://github.com/login/oauth/access_token"
 COPILOT_TOKEN_URL = "https://api.github.com/copilot_internal/v2/token"
 COPILOT_API_URL = "https://api.githubcopilot.com/chat/completions"
 
+# Refresh the Copilot API token this many seconds before it expires,
+# so in-flight requests never carry a token that expires mid-request
+COPILOT_TOKEN_REFRESH_THRESHOLD = 60
+
+# Device flow polling: back off exponentially after this many attempts,
+# never waiting longer than DEVICE_POLL_MAX_INTERVAL seconds (unless GitHub asks to)
+DEVICE_POLL_BACKOFF_AFTER = 30
+DEVICE_POLL_MAX_INTERVAL = 30
+
+# Timeout (seconds) for the GitHub auth and token endpoints; these answer
+# quickly, unlike model completions, so they don't use the client's default
+GITHUB_AUTH_TIMEOUT = 10.0
+
+# Fallback API token lifetime when GitHub doesn't report one (~30 min tokens)
+COPILOT_TOKEN_DEFAULT_TTL = 25 * 60
+
 # Copilot Default Headers (mimics VS Code Copilot extension)
 COPILOT_EDITOR_VERSION = "vscode/1.104.1"
 COPILOT_PLUGIN_VERSION = "copilot-chat/0.26.7"
@@ -64,8 +87,9 @@ def get_data_dir() -> Path:
     return data_dir
 
 
+@functools.lru_cache(maxsize=1)
 def get_encryption_key() -> bytes:
-    """Get or create the encryption key for token storage."""
+    """Get or create the encryption key for token storage (read once per process)."""
     key_file = get_data_dir() / ".encryption_key"
     if key_file.exists():
         return key_file.read_bytes()
@@ -75,29 +99,40 @@ def get_encryption_key() -> bytes:
         return key
 
 
+@functools.lru_cache(maxsize=1)
+def get_fernet() -> Fernet:
+    """Get the Fernet instance for token encryption, built once from the key."""
+    return Fernet(get_encryption_key())
+
+
 def encrypt_token(token: str) -> str:
     """Encrypt a token for secure storage."""
-    key = get_encryption_key()
-    f = Fernet(key)
-    encrypted = f.encrypt(token.encode())
+    encrypted = get_fernet().encrypt(token.encode())
     return base64.b64encode(encrypted).decode()
 
 
 def decrypt_token(encrypted_token: str) -> str:
     """Decrypt a stored token."""
-    key = get_encryption_key()
-    f = Fernet(key)
-    decrypted = f.decrypt(base64.b64decode(encrypted_token.encode()))
+    decrypted = get_fernet().decrypt(base64.b64decode(encrypted_token.encode()))
     return decrypted.decode()
 
 
 class CopilotService:
     """Service for GitHub Copilot authentication and API calls."""
 
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         self.token_file = get_data_dir() / ".copilot_token"
+        # Short-lived API token, shared across restarts and worker processes
+        self.api_token_file = get_data_dir() / ".copilot_api_token"
+        self._http_client = http_client
         self._cached_api_token: Optional[str] = None
         self._api_token_expires: float = 0
+        self._token_lock = asyncio.Lock()
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """The client used for all GitHub/Copilot requests (shared by default)."""
+        return self._http_client or get_http_client()
 
     def is_authenticated(self) -> bool:
         """Check if we have a stored GitHub access token."""
@@ -111,21 +146,47 @@ class CopilotService:
             encrypted = self.token_file.read_text()
             return decrypt_token(encrypted)
         except Exception as e:
-            print(f"Error reading stored token: {e}")
+            logger.error("Error reading stored token: %s", e)
             return None
 
     def save_access_token(self, token: str) -> None:
         """Save the GitHub access token securely."""
         encrypted = encrypt_token(token)
         self.token_file.write_text(encrypted)
+        # Any cached API token belongs to the previous login
+        self._clear_api_token()
 
     def clear_token(self) -> None:
         """Clear the stored token (logout)."""
         if self.token_file.exists():
             self.token_file.unlink()
+        self._clear_api_token()
+
+    def _clear_api_token(self) -> None:
+        """Drop the cached Copilot API token, in memory and on disk."""
+        self.api_token_file.unlink(missing_ok=True)
         self._cached_api_token = None
         self._api_token_expires = 0
 
+    def _load_persisted_api_token(self) -> None:
+        """Hydrate the in-memory API token cache from the token file, if present."""
+        if not self.api_token_file.exists():
+            return
+        try:
+            data = json.loads(decrypt_token(self.api_token_file.read_text()))
+            self._cached_api_token = data["token"]
+            self._api_token_expires = float(data["expires_at"])
+        except Exception as e:
+            logger.warning("Error reading cached Copilot API token: %s", e)
+
+    def _persist_api_token(self) -> None:
+        """Write the current API token and its expiry to the token file."""
+        payload = json.dumps({
+            "token": self._cached_api_token,
+            "expires_at": self._api_token_expires,
+        })
+        self.api_token_file.write_text(encrypt_token(payload))
+
     async def get_device_code(self) -> Dict[str, Any]:
         """
         Start the GitHub Device Flow authentication.
@@ -133,17 +194,18 @@ class CopilotService:
         Returns:
             Dict with device_code, user_code, verification_uri, etc.
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                GITHUB_DEVICE_CODE_URL,
-                data={
-                    "client_id": COPILOT_CLIENT_ID,
-                    "scope": "read:user",
-                },
-                headers={"Accept": "application/json"},
-            )
-            response.raise_for_status()
-            return response.json()
+        client = self.http_client
+        response = await client.post(
+            GITHUB_DEVICE_CODE_URL,
+            data={
+                "client_id": COPILOT_CLIENT_ID,
+                "scope": "read:user",
+            },
+            headers={"Accept": "application/json"},
+            timeout=GITHUB_AUTH_TIMEOUT,
+        )
+        response.raise_for_status()
+        return response.json()
 
     async def poll_for_access_token(
         self,
@@ -154,45 +216,61 @@ class CopilotService:
         """
         Poll GitHub for the access token after user authorizes.
 
+        Polls immediately, then waits between attempts. The wait follows the
+        `interval` GitHub returns (it raises it on `slow_down`), and backs off
+        exponentially after DEVICE_POLL_BACKOFF_AFTER attempts, capped at
+        DEVICE_POLL_MAX_INTERVAL seconds.
+
         Args:
             device_code: The device code from get_device_code()
-            interval: Polling interval in seconds
+            interval: Initial polling interval in seconds
             max_attempts: Maximum polling attempts
 
         Returns:
             The access token if successful, None otherwise
         """
-        async with httpx.AsyncClient() as client:
-            for attempt in range(max_attempts):
-                await asyncio.sleep(interval)
-
-                response = await client.post(
-                    GITHUB_ACCESS_TOKEN_URL,
-                    data={
-                        "client_id": COPILOT_CLIENT_ID,
-                        "device_code": device_code,
-                        "grant_type": "urn:ietf:params:oauth:grant-type:device_code",
-                    },
-                    headers={"Accept": "application/json"},
-                )
+        client = self.http_client
+        for attempt in range(max_attempts):
+            response = await client.post(
+                GITHUB_ACCESS_TOKEN_URL,
+                data={
+                    "client_id": COPILOT_CLIENT_ID,
+                    "device_code": device_code,
+                    "grant_type": "urn:ietf:params:oauth:grant-type:device_code",
+                },
+                headers={"Accept": "application/json"},
+                timeout=GITHUB_AUTH_TIMEOUT,
+            )
 
-                data = response.json()
+            data = response.json()
 
-                if "access_token" in data:
-                    access_token = data["access_token"]
-                    self.save_access_token(access_token)
-                    return access_token
-
-                error = data.get("error")
-                if error == "authorization_pending":
-                    continue
-                elif error == "slow_down":
-                    interval += 5
-                    continue
-                elif error == "expired_token":
-                    return None
-                elif error == "access_denied":
-                    return None
+            if "access_token" in data:
+                access_token = data["access_token"]
+                # Encryption + file write run off the event loop
+                await asyncio.to_thread(self.save_access_token, access_token)
+                return access_token
+
+            error = data.get("error")
+            if error == "expired_token":
+                return None
+            elif error == "access_denied":
+                return None
+
+            # Honor the server-supplied interval; fall back to bumping it ourselves
+            server_interval = data.get("interval")
+            if isinstance(server_interval, (int, float)) and server_interval > 0:
+                interval = server_interval
+            elif error == "slow_down":
+                interval += 5
+
+            if attempt == max_attempts - 1:
+                break
+
+            delay = interval
+            if attempt >= DEVICE_POLL_BACKOFF_AFTER:
+                backoff = interval * 2 ** (attempt - DEVICE_POLL_BACKOFF_AFTER + 1)
+                delay = max(interval, min(backoff, DEVICE_POLL_MAX_INTERVAL))
+            await asyncio.sleep(delay)
 
         return None
 
@@ -205,38 +283,79 @@ class CopilotService:
         Returns:
             The Copilot API token if successful, None otherwise
         """
-        import time
-
-        # Check cache first
-        if self._cached_api_token and time.time() < self._api_token_expires:
+        # Fast path: cached token still valid, no locking needed
+        if self._is_api_token_valid():
             return self._cached_api_token
 
-        access_token = self.get_stored_access_token()
-        if not access_token:
-            return None
+        # Only one coroutine refreshes; the others wait and reuse its result
+        async with self._token_lock:
+            if self._is_api_token_valid():
+                return self._cached_api_token
 
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
+            # Another process (or a previous run) may have refreshed it already
+            await asyncio.to_thread(self._load_persisted_api_token)
+            if self._is_api_token_valid():
+                return self._cached_api_token
+
+            # File read + decryption run off the event loop
+            access_token = await asyncio.to_thread(self.get_stored_access_token)
+            if not access_token:
+                return None
+
+            try:
+                response = await self.http_client.get(
                     COPILOT_TOKEN_URL,
                     headers={
                         "Authorization": f"token {access_token}",
                         "Accept": "application/json",
                         **COPILOT_DEFAULT_HEADERS,
                     },
+                    timeout=GITHUB_AUTH_TIMEOUT,
                 )
                 response.raise_for_status()
                 data = response.json()
 
                 self._cached_api_token = data.get("token")
-                # Token expires in ~30 minutes, cache for 25 minutes
-                self._api_token_expires = time.time() + 25 * 60
+                self._api_token_expires = self._parse_api_token_expiry(data)
+                if self._cached_api_token:
+                    await asyncio.to_thread(self._persist_api_token)
 
                 return self._cached_api_token
 
-        except Exception as e:
-            print(f"Error getting Copilot API token: {e}")
-            return None
+            except Exception as e:
+                logger.warning("Error getting Copilot API token: %s", e)
+                return None
+
+    @staticmethod
+    def _parse_api_token_expiry(data: Dict[str, Any]) -> float:
+        """
+        Get the API token expiry time from GitHub's token response.
+
+        Prefers the absolute `expires_at` timestamp, then the relative
+        `refresh_in` hint, and only falls back to a fixed lifetime if neither
+        is present.
+
+        Args:
+            data: JSON body of the copilot_internal/v2/token response
+
+        Returns:
+            Unix timestamp at which the token should be considered expired
+        """
+        expires_at = data.get("expires_at")
+        if isinstance(expires_at, (int, float)) and expires_at > 0:
+            return float(expires_at)
+
+        refresh_in = data.get("refresh_in")
+        if isinstance(refresh_in, (int, float)) and refresh_in > 0:
+            return time.time() + refresh_in
+
+        return time.time() + COPILOT_TOKEN_DEFAULT_TTL
+
+    def _is_api_token_valid(self) -> bool:
+        """Check if the cached API token is set and not about to expire."""
+        return bool(self._cached_api_token) and (
+            time.time() < self._api_token_expires - COPILOT_TOKEN_REFRESH_THRESHOLD
+        )
 
     async def query_model(
         self,
@@ -257,7 +376,7 @@ class CopilotService:
         """
         api_token = await self.get_copilot_api_token()
         if not api_token:
-            print("Error: No Copilot API token available. Please authenticate first.")
+            logger.warning("No Copilot API token available. Please authenticate first.")
             return None
 
         headers = {
@@ -272,24 +391,24 @@ class CopilotService:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.post(
-                    COPILOT_API_URL,
-                    headers=headers,
-                    json=payload,
-                )
-                response.raise_for_status()
+            response = await self.http_client.post(
+                COPILOT_API_URL,
+                headers=headers,
+                json=payload,
+                timeout=timeout,
+            )
+            response.raise_for_status()
 
-                data = response.json()
-                message = data["choices"][0]["message"]
+            data = response.json()
+            message = data["choices"][0]["message"]
 
-                return {
-                    "content": message.get("content"),
-                    "reasoning_details": message.get("reasoning_details"),
-                }
+            return {
+                "content": message.get("content"),
+                "reasoning_details": message.get("reasoning_details"),
+            }
 
         except Exception as e:
-            print(f"Error querying Copilot model {model}: {e}")
+            logger.warning("Error querying Copilot model %s: %s", model, e)
             return None
 
 
@@ -1,8 +1,8 @@
 """3-stage LLM Council orchestration."""
 
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, AsyncIterator
 from .providers import provider_registry
-from .config import COUNCIL_MODELS, CHAIRMAN_MODEL
+from .config import COUNCIL_MODELS, CHAIRMAN_MODEL, COUNCIL_STAGE_TIMEOUT
 
 
 async def stage1_collect_responses(user_query: str) -> List[Dict[str, Any]]:
@@ -13,23 +13,52 @@ async def stage1_collect_responses(user_query: str) -> List[Dict[str, Any]]:
         user_query: The user's question
 
     Returns:
-        List of dicts with 'model' and 'response' keys
+        List of dicts with 'model' and 'response' keys, in council order
     """
-    messages = [{"role": "user", "content": user_query}]
+    stage1_results = [result async for result in stage1_stream_responses(user_query)]
+    sort_stage1_results(stage1_results)
+    return stage1_results
 
-    # Query all models sequentially using provider registry
-    responses = await provider_registry.query_models_sequential(COUNCIL_MODELS, messages)
 
-    # Format results
-    stage1_results = []
-    for model, response in responses.items():
+def sort_stage1_results(stage1_results: List[Dict[str, Any]]) -> None:
+    """
+    Sort Stage 1 results in place into COUNCIL_MODELS order.
+
+    Results arrive in completion order; sorting them keeps the Stage 2
+    "Response A/B/C" labels stable across runs and endpoints.
+
+    Args:
+        stage1_results: Results from stage1_stream_responses
+    """
+    stage1_results.sort(key=lambda result: COUNCIL_MODELS.index(result['model']))
+
+
+async def stage1_stream_responses(user_query: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stage 1 (streaming): Query all council models in parallel and yield each
+    response as soon as it arrives.
+
+    Models used to be queried one at a time with a 1s pause to stay under
+    Copilot rate limits; the per-provider semaphore in ProviderRegistry
+    now bounds concurrency instead.
+
+    Args:
+        user_query: The user's question
+
+    Yields:
+        Dicts with 'model' and 'response' keys, in completion order
+        (failed models are skipped)
+    """
+    messages = [{"role": "user", "content": user_query}]
+
+    async for model, response in provider_registry.query_models_streaming(
+        COUNCIL_MODELS, messages, stage_timeout=COUNCIL_STAGE_TIMEOUT
+    ):
         if response is not None:  # Only include successful responses
-            stage1_results.append({
+            yield {
                 "model": model,
                 "response": response.get('content', '')
-            })
-
-    return stage1_results
+            }
 
 
 async def stage2_collect_rankings(
@@ -95,7 +124,9 @@ Now provide your evaluation and ranking:"""
     messages = [{"role": "user", "content": ranking_prompt}]
 
     # Get rankings from all council models in parallel using provider registry
-    responses = await provider_registry.query_models_parallel(COUNCIL_MODELS, messages)
+    responses = await provider_registry.query_models_parallel(
+        COUNCIL_MODELS, messages, stage_timeout=COUNCIL_STAGE_TIMEOUT
+    )
 
     # Format results
     stage2_results = []
@@ -158,8 +189,9 @@ Provide a clear, well-reasoned final answer that represents the council's collec
 
     messages = [{"role": "user", "content": chairman_prompt}]
 
-    # Query the chairman model using provider registry
-    response = await provider_registry.query_model(CHAIRMAN_MODEL, messages)
+    # Query the chairman model using provider registry; it has no fallback,
+    # so it is always tried even if it has been failing
+    response = await provider_registry.query_model(CHAIRMAN_MODEL, messages, skip_if_failing=False)
 
     if response is None:
         # Fallback if chairman fails
@@ -275,7 +307,9 @@ Title:"""
     messages = [{"role": "user", "content": title_prompt}]
 
     # Use a fast model for title generation via provider registry
-    response = await provider_registry.query_model("copilot/gpt-4o-mini", messages, timeout=30.0)
+    response = await provider_registry.query_model(
+        "copilot/gpt-4o-mini", messages, timeout=30.0, skip_if_failing=False
+    )
 
     if response is None:
         # Fallback to a generic title
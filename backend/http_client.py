@@ -0,0 +1,63 @@
+"""Shared HTTP client for outbound LLM API requests."""
+
+import logging
+import httpx
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Process-wide client, set at FastAPI startup (see main.py)
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Create an AsyncClient with connection pooling for LLM API calls.
+
+    HTTP/2 lets the parallel council requests to one host share a single
+    connection. HTTP/1.1 stays enabled as a fallback for hosts without it.
+    Response compression (gzip, and br via the brotli extra) is negotiated by
+    httpx's default Accept-Encoding header.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        timeout=httpx.Timeout(120.0),
+        http2=True,
+    )
+
+
+async def probe_http_version(client: httpx.AsyncClient, url: str) -> None:
+    """
+    Log a warning if requests to `url` don't negotiate HTTP/2.
+
+    Args:
+        client: Client to probe with
+        url: Any URL on the host to check (the response status is ignored)
+    """
+    try:
+        response = await client.head(url, timeout=10.0)
+    except Exception as e:
+        logger.warning("HTTP/2 probe to %s failed: %s", url, e)
+        return
+
+    if response.http_version != "HTTP/2":
+        logger.warning("Connection to %s negotiated %s instead of HTTP/2", url, response.http_version)
+
+
+def set_http_client(client: Optional[httpx.AsyncClient]) -> None:
+    """Install the process-wide client (or clear it with None)."""
+    global _http_client
+    _http_client = client
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide client, creating one lazily if none was installed.
+
+    Returns:
+        The shared httpx.AsyncClient
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
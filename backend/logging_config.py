@@ -0,0 +1,74 @@
+"""Logging setup that keeps log I/O off the asyncio event loop."""
+
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Tuple
+
+# Loggers whose output is moved to a background thread
+_QUEUED_LOGGERS = ("backend", "uvicorn", "uvicorn.access")
+
+# (logger, queue handler, listener) for each logger moved to a queue
+_queued: List[Tuple[logging.Logger, QueueHandler, QueueListener]] = []
+
+
+class _InProcessQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues records untouched.
+
+    The default prepare() formats the message and clears record.args so the
+    record can be pickled; the queue here is in-process, and uvicorn's
+    AccessFormatter needs record.args intact.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """
+    Route backend and uvicorn logging through QueueHandlers.
+
+    Records are enqueued unformatted on the event loop; formatting and writing
+    to stdout/stderr happen on QueueListener threads. Each logger keeps its own
+    listener so its existing handlers (e.g. uvicorn's formatters) still apply.
+
+    Args:
+        level: Log level for the backend logger
+    """
+    if _queued:
+        return
+
+    backend_logger = logging.getLogger("backend")
+    backend_logger.setLevel(level)
+    if not backend_logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(levelname)s:     %(name)s - %(message)s"))
+        backend_logger.addHandler(handler)
+        backend_logger.propagate = False
+
+    for name in _QUEUED_LOGGERS:
+        logger = logging.getLogger(name)
+        handlers = logger.handlers[:]
+        if not handlers:
+            continue
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        for handler in handlers:
+            logger.removeHandler(handler)
+        queue_handler = _InProcessQueueHandler(log_queue)
+        logger.addHandler(queue_handler)
+
+        listener.start()
+        _queued.append((logger, queue_handler, listener))
+
+
+def shutdown_logging() -> None:
+    """Flush queued records, stop the listener threads and restore the original handlers."""
+    while _queued:
+        logger, queue_handler, listener = _queued.pop()
+        logger.removeHandler(queue_handler)
+        listener.stop()
+        for handler in listener.handlers:
+            logger.addHandler(handler)
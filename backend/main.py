@@ -1,18 +1,21 @@
 """FastAPI backend for LLM Council."""
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import uuid
-import json
+import hashlib
 import asyncio
+import orjson
 
 from . import storage
-from .council import run_full_council, generate_conversation_title, stage1_collect_responses, stage2_collect_rankings, stage3_synthesize_final, calculate_aggregate_rankings
-from .copilot import copilot_service, COPILOT_MODELS
+from .council import run_full_council, generate_conversation_title, stage1_stream_responses, sort_stage1_results, stage2_collect_rankings, stage3_synthesize_final, calculate_aggregate_rankings
+from .copilot import copilot_service, COPILOT_MODELS, COPILOT_API_URL
 from .providers import provider_registry
+from .http_client import create_http_client, set_http_client, probe_http_version
+from .logging_config import configure_logging, shutdown_logging
 from .config import COUNCIL_MODELS, COPILOT_MODELS as CONFIG_COPILOT_MODELS, OPENROUTER_MODELS
 
 app = FastAPI(title="LLM Council API")
@@ -27,6 +30,80 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def startup_logging():
+    """Move log output off the event loop (see logging_config.py)."""
+    configure_logging()
+
+
+@app.on_event("shutdown")
+async def shutdown_logging_listeners():
+    """Flush queued log records."""
+    shutdown_logging()
+
+
+@app.on_event("startup")
+async def startup_http_client():
+    """Create the shared HTTP client used for all outbound LLM API calls."""
+    app.state.http_client = create_http_client()
+    set_http_client(app.state.http_client)
+    # Check HTTP/2 negotiation in the background so startup isn't delayed
+    app.state.http_probe_task = asyncio.create_task(
+        probe_http_version(app.state.http_client, COPILOT_API_URL)
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    """Close the shared HTTP client and its pooled connections."""
+    app.state.http_probe_task.cancel()
+    set_http_client(None)
+    await app.state.http_client.aclose()
+
+
+def sse_event(payload: Dict[str, Any]) -> bytes:
+    """Encode a payload as a Server-Sent Events `data:` frame."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+# Pre-encoded SSE frames for events without a payload
+SSE_STAGE1_START = sse_event({"type": "stage1_start"})
+SSE_STAGE2_START = sse_event({"type": "stage2_start"})
+SSE_STAGE3_START = sse_event({"type": "stage3_start"})
+SSE_COMPLETE = sse_event({"type": "complete"})
+
+
+def make_etag(body: bytes) -> str:
+    """Compute a strong ETag for a response body."""
+    return f'"{hashlib.sha256(body).hexdigest()}"'
+
+
+def cached_json_response(
+    http_request: Request,
+    body: bytes,
+    etag: str,
+    cache_control: str
+) -> Response:
+    """
+    Build a JSON response for a pre-encoded body, honouring If-None-Match.
+
+    Args:
+        http_request: The incoming request
+        body: Pre-encoded JSON body
+        etag: ETag of `body`
+        cache_control: Cache-Control header value
+
+    Returns:
+        304 Not Modified if the client already has this version, else the body
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = http_request.headers.get("if-none-match", "")
+    client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in client_etags or "*" in client_etags:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 class CreateConversationRequest(BaseModel):
     """Request to create a new conversation."""
     pass
@@ -117,6 +194,8 @@ async def copilot_poll_token(request: CopilotPollRequest):
             max_attempts=24  # 2 minutes max
         )
         if access_token:
+            # Copilot models may have been failing only because we weren't authenticated
+            provider_registry.reset_failures()
             return {"success": True, "message": "Authentication successful"}
         else:
             return {"success": False, "message": "Authentication failed or expired"}
@@ -148,30 +227,39 @@ async def list_providers():
     return providers
 
 
+# (registry payload, encoded body, ETag) for the last /api/models response
+_models_response_cache: Optional[Tuple[List[Dict[str, str]], bytes, str]] = None
+
+
 @app.get("/api/models")
-async def list_models():
+async def list_models(http_request: Request):
     """List all available models across all providers."""
-    models = []
-    for name in provider_registry.list_available_providers():
-        provider = provider_registry.get(name)
-        if provider:
-            for model in provider.supported_models:
-                models.append({
-                    "id": f"{name}/{model}" if name != "openrouter" else model,
-                    "provider": name,
-                    "name": model
-                })
-    return models
+    global _models_response_cache
+    models = provider_registry.list_models()
+    # The registry returns the same list object until its cache is invalidated
+    if _models_response_cache is None or _models_response_cache[0] is not models:
+        body = orjson.dumps(models)
+        _models_response_cache = (models, body, make_etag(body))
+    _, body, etag = _models_response_cache
+    # Availability changes on Copilot login/logout, so always revalidate
+    return cached_json_response(http_request, body, etag, "no-cache")
+
+
+# Council configuration only changes on restart, so encode it once
+_COUNCIL_CONFIG_BODY = orjson.dumps({
+    "council_models": COUNCIL_MODELS,
+    "copilot_models": CONFIG_COPILOT_MODELS,
+    "openrouter_models": OPENROUTER_MODELS,
+})
+_COUNCIL_CONFIG_ETAG = make_etag(_COUNCIL_CONFIG_BODY)
 
 
 @app.get("/api/council/config")
-async def get_council_config():
+async def get_council_config(http_request: Request):
     """Get current council configuration."""
-    return {
-        "council_models": COUNCIL_MODELS,
-        "copilot_models": CONFIG_COPILOT_MODELS,
-        "openrouter_models": OPENROUTER_MODELS,
-    }
+    return cached_json_response(
+        http_request, _COUNCIL_CONFIG_BODY, _COUNCIL_CONFIG_ETAG, "public, max-age=60"
+    )
 
 
 # ==================== Conversation Endpoints ====================
@@ -206,33 +294,40 @@ async def send_message(conversation_id: str, request: SendMessageRequest):
     Send a message and run the 3-stage council process.
     Returns the complete response with all stages.
     """
-    # Check if conversation exists
-    conversation = storage.get_conversation(conversation_id)
-    if conversation is None:
+    # Check if conversation exists (the turn is persisted in one write at the end)
+    conversation_meta = storage.get_conversation_metadata(conversation_id)
+    if conversation_meta is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
     # Check if this is the first message
-    is_first_message = len(conversation["messages"]) == 0
+    is_first_message = conversation_meta["message_count"] == 0
 
-    # Add user message
-    storage.add_user_message(conversation_id, request.content)
-
-    # If this is the first message, generate a title
+    # If this is the first message, generate a title in parallel (don't await yet)
+    title_task = None
     if is_first_message:
-        title = await generate_conversation_title(request.content)
-        storage.update_conversation_title(conversation_id, title)
+        title_task = asyncio.create_task(generate_conversation_title(request.content))
 
     # Run the 3-stage council process
-    stage1_results, stage2_results, stage3_result, metadata = await run_full_council(
-        request.content
-    )
+    try:
+        stage1_results, stage2_results, stage3_result, metadata = await run_full_council(
+            request.content
+        )
+    except BaseException:
+        if title_task:
+            title_task.cancel()
+        raise
+
+    # Wait for title generation if it was started
+    title = await title_task if title_task else None
 
-    # Add assistant message with all stages
-    storage.add_assistant_message(
+    # Save user message, assistant message and title in one write
+    storage.commit_turn(
         conversation_id,
+        request.content,
         stage1_results,
         stage2_results,
-        stage3_result
+        stage3_result,
+        title=title
     )
 
     # Return the complete response with metadata
@@ -245,66 +340,79 @@ async def send_message(conversation_id: str, request: SendMessageRequest):
 
 
 @app.post("/api/conversations/{conversation_id}/message/stream")
-async def send_message_stream(conversation_id: str, request: SendMessageRequest):
+async def send_message_stream(
+    conversation_id: str,
+    request: SendMessageRequest
+):
     """
     Send a message and stream the 3-stage council process.
     Returns Server-Sent Events as each stage completes.
     """
-    # Check if conversation exists
-    conversation = storage.get_conversation(conversation_id)
-    if conversation is None:
+    # Check if conversation exists (the turn is persisted in one write at the end)
+    conversation_meta = storage.get_conversation_metadata(conversation_id)
+    if conversation_meta is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
     # Check if this is the first message
-    is_first_message = len(conversation["messages"]) == 0
+    is_first_message = conversation_meta["message_count"] == 0
 
     async def event_generator():
+        title_task = None
         try:
-            # Add user message
-            storage.add_user_message(conversation_id, request.content)
-
             # Start title generation in parallel (don't await yet)
-            title_task = None
             if is_first_message:
                 title_task = asyncio.create_task(generate_conversation_title(request.content))
 
             # Stage 1: Collect responses
-            yield f"data: {json.dumps({'type': 'stage1_start'})}\n\n"
-            stage1_results = await stage1_collect_responses(request.content)
-            yield f"data: {json.dumps({'type': 'stage1_complete', 'data': stage1_results})}\n\n"
+            yield SSE_STAGE1_START
+            stage1_results = []
+            async for result in stage1_stream_responses(request.content):
+                stage1_results.append(result)
+                yield sse_event({'type': 'stage1_partial', 'data': result})
+            sort_stage1_results(stage1_results)
+            yield sse_event({'type': 'stage1_complete', 'data': stage1_results})
 
             # Stage 2: Collect rankings
-            yield f"data: {json.dumps({'type': 'stage2_start'})}\n\n"
+            yield SSE_STAGE2_START
             stage2_results, label_to_model = await stage2_collect_rankings(request.content, stage1_results)
             aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
-            yield f"data: {json.dumps({'type': 'stage2_complete', 'data': stage2_results, 'metadata': {'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings}})}\n\n"
+            yield sse_event({'type': 'stage2_complete', 'data': stage2_results, 'metadata': {'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings}})
 
             # Stage 3: Synthesize final answer
-            yield f"data: {json.dumps({'type': 'stage3_start'})}\n\n"
+            yield SSE_STAGE3_START
             stage3_result = await stage3_synthesize_final(request.content, stage1_results, stage2_results)
-            yield f"data: {json.dumps({'type': 'stage3_complete', 'data': stage3_result})}\n\n"
+            yield sse_event({'type': 'stage3_complete', 'data': stage3_result})
 
             # Wait for title generation if it was started
-            if title_task:
-                title = await title_task
-                storage.update_conversation_title(conversation_id, title)
-                yield f"data: {json.dumps({'type': 'title_complete', 'data': {'title': title}})}\n\n"
+            title = await title_task if title_task else None
 
-            # Save complete assistant message
-            storage.add_assistant_message(
+            # Save user message, assistant message and title in one write
+            storage.commit_turn(
                 conversation_id,
+                request.content,
                 stage1_results,
                 stage2_results,
-                stage3_result
+                stage3_result,
+                title=title
             )
+            if title is not None:
+                yield sse_event({'type': 'title_complete', 'data': {'title': title}})
 
             # Send completion event
-            yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+            yield SSE_COMPLETE
 
         except Exception as e:
             # Send error event
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            yield sse_event({'type': 'error', 'message': str(e)})
+
+        finally:
+            # Don't leave title generation running if the stream was abandoned
+            if title_task and not title_task.done():
+                title_task.cancel()
 
+    # Starlette cancels the generator when the client disconnects; the
+    # cancellation reaches the in-flight council queries, which cancel their
+    # tasks on the way out
     return StreamingResponse(
         event_generator(),
         media_type="text/event-stream",
@@ -317,4 +425,5 @@ async def send_message_stream(conversation_id: str, request: SendMessageRequest)
 
 if __name__ == "__main__":
     import uvicorn
+    # uvicorn's default loop="auto" already picks uvloop when it's installed
     uvicorn.run(app, host="0.0.0.0", port=8001)
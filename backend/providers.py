@@ -1,8 +1,32 @@
 """Unified provider abstraction for different LLM APIs."""
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Sequence, Tuple
 import asyncio
+import logging
+import time
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Maximum concurrent in-flight requests per provider, to avoid rate-limit
+# storms when council fan-outs (e.g. Stage 2 rankings) hit one endpoint
+PROVIDER_MAX_CONCURRENCY = 8
+
+# Consecutive failures after which a model is skipped, so a broken or
+# deprecated model doesn't cost a full timeout on every message
+MODEL_FAILURE_THRESHOLD = 3
+
+# How long (seconds) a tripped model is skipped before one probe request is
+# let through; a success clears it, a failure restarts the cooldown
+MODEL_FAILURE_COOLDOWN = 60
+
+
+class ProviderUnavailableError(Exception):
+    """
+    Raised by a provider when it can't send any request right now (e.g. no
+    API token), as opposed to a specific model failing.
+    """
 
 
 class Provider(ABC):
@@ -16,8 +40,8 @@ class Provider(ABC):
 
     @property
     @abstractmethod
-    def supported_models(self) -> List[str]:
-        """Return list of supported model identifiers."""
+    def supported_models(self) -> Sequence[str]:
+        """Return the supported model identifiers (treat as read-only)."""
         pass
 
     @abstractmethod
@@ -37,6 +61,9 @@ class Provider(ABC):
 
         Returns:
             Response dict with 'content' and optional 'reasoning_details', or None if failed
+
+        Raises:
+            ProviderUnavailableError: If the provider can't make requests at all
         """
         pass
 
@@ -49,29 +76,32 @@ class Provider(ABC):
 class OpenRouterProvider(Provider):
     """Provider for OpenRouter API."""
 
-    def __init__(self):
+    _MODELS = (
+        "openai/gpt-4o",
+        "openai/gpt-4o-mini",
+        "openai/o1-preview",
+        "openai/o1-mini",
+        "anthropic/claude-3.5-sonnet",
+        "anthropic/claude-3-opus",
+        "google/gemini-pro",
+        "google/gemini-2.0-flash-exp",
+        "meta-llama/llama-3.1-405b-instruct",
+        "x-ai/grok-2",
+    )
+
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         from .config import OPENROUTER_API_KEY
         self.api_key = OPENROUTER_API_KEY
+        self.http_client = http_client
 
     @property
     def name(self) -> str:
         return "openrouter"
 
     @property
-    def supported_models(self) -> List[str]:
+    def supported_models(self) -> Sequence[str]:
         # OpenRouter supports many models, these are just commonly used ones
-        return [
-            "openai/gpt-4o",
-            "openai/gpt-4o-mini",
-            "openai/o1-preview",
-            "openai/o1-mini",
-            "anthropic/claude-3.5-sonnet",
-            "anthropic/claude-3-opus",
-            "google/gemini-pro",
-            "google/gemini-2.0-flash-exp",
-            "meta-llama/llama-3.1-405b-instruct",
-            "x-ai/grok-2",
-        ]
+        return self._MODELS
 
     def is_available(self) -> bool:
         return bool(self.api_key)
@@ -83,7 +113,7 @@ class OpenRouterProvider(Provider):
         timeout: float = 120.0
     ) -> Optional[Dict[str, Any]]:
         from .openrouter import query_model
-        return await query_model(model, messages, timeout)
+        return await query_model(model, messages, timeout, client=self.http_client)
 
 
 class CopilotProvider(Provider):
@@ -93,16 +123,17 @@ class CopilotProvider(Provider):
         from .copilot import copilot_service, COPILOT_MODELS
         from .config import COPILOT_MODELS as CONFIG_COPILOT_MODELS
         self.service = copilot_service
-        # Use the imported list from config (already has copilot/ prefix)
-        self._models = CONFIG_COPILOT_MODELS
+        # Use the imported list from config (already has copilot/ prefix);
+        # stored as a tuple so it can be shared without copying
+        self._models = tuple(CONFIG_COPILOT_MODELS)
 
     @property
     def name(self) -> str:
         return "copilot"
 
     @property
-    def supported_models(self) -> List[str]:
-        return self._models.copy()
+    def supported_models(self) -> Sequence[str]:
+        return self._models
 
     def is_available(self) -> bool:
         return self.service.is_authenticated()
@@ -113,6 +144,10 @@ class CopilotProvider(Provider):
         messages: List[Dict[str, str]],
         timeout: float = 120.0
     ) -> Optional[Dict[str, Any]]:
+        # Fetched (and cached) up front so a token problem isn't mistaken
+        # for the model failing
+        if not await self.service.get_copilot_api_token():
+            raise ProviderUnavailableError("No Copilot API token available")
         return await self.service.query_model(model, messages, timeout)
 
 
@@ -121,6 +156,12 @@ class ProviderRegistry:
 
     def __init__(self):
         self._providers: Dict[str, Provider] = {}
+        self._provider_sems: Dict[str, asyncio.Semaphore] = {}
+        self._parsed_cache: Dict[str, Tuple[str, str]] = {}
+        # model_id -> (consecutive failures, time until which the model is skipped)
+        self._failures: Dict[str, Tuple[int, float]] = {}
+        # (available provider names, /api/models payload)
+        self._models_cache: Optional[Tuple[Tuple[str, ...], List[Dict[str, str]]]] = None
         self._register_default_providers()
 
     def _register_default_providers(self):
@@ -131,6 +172,10 @@ class ProviderRegistry:
     def register(self, provider: Provider) -> None:
         """Register a provider."""
         self._providers[provider.name] = provider
+        self._provider_sems[provider.name] = asyncio.Semaphore(PROVIDER_MAX_CONCURRENCY)
+        # Parsing and the model list depend on the known providers
+        self._parsed_cache.clear()
+        self._models_cache = None
 
     def get(self, name: str) -> Optional[Provider]:
         """Get a provider by name."""
@@ -144,6 +189,34 @@ class ProviderRegistry:
         """List all available (configured) provider names."""
         return [name for name, provider in self._providers.items() if provider.is_available()]
 
+    def list_models(self) -> List[Dict[str, str]]:
+        """
+        List all models across available providers.
+
+        The result is cached and rebuilt only when providers are registered or
+        their availability changes (e.g. Copilot login/logout). Callers must
+        not mutate it.
+
+        Returns:
+            List of dicts with 'id', 'provider' and 'name' keys
+        """
+        available = tuple(self.list_available_providers())
+        if self._models_cache is None or self._models_cache[0] != available:
+            models = []
+            for name in available:
+                for model in self._providers[name].supported_models:
+                    models.append({
+                        "id": f"{name}/{model}" if name != "openrouter" else model,
+                        "provider": name,
+                        "name": model
+                    })
+            self._models_cache = (available, models)
+        return self._models_cache[1]
+
+    def reset_failures(self) -> None:
+        """Forget recorded model failures (e.g. after re-authenticating)."""
+        self._failures.clear()
+
     def parse_model_identifier(self, model_id: str) -> tuple[str, str]:
         """
         Parse a model identifier into provider and model name.
@@ -159,6 +232,14 @@ class ProviderRegistry:
         Returns:
             Tuple of (provider_name, model_name)
         """
+        parsed = self._parsed_cache.get(model_id)
+        if parsed is None:
+            parsed = self._parse_model_identifier(model_id)
+            self._parsed_cache[model_id] = parsed
+        return parsed
+
+    def _parse_model_identifier(self, model_id: str) -> Tuple[str, str]:
+        """Uncached implementation of parse_model_identifier."""
         parts = model_id.split("/", 1)
 
         if len(parts) == 1:
@@ -174,11 +255,34 @@ class ProviderRegistry:
         # Otherwise, assume it's an OpenRouter model (e.g., "openai/gpt-4o")
         return ("openrouter", model_id)
 
+    def _should_skip(self, model_id: str) -> bool:
+        """
+        Check whether a model is tripped and still cooling down.
+
+        Once the cooldown has passed, the caller is let through as a probe and
+        the cooldown restarts, so concurrent callers keep skipping until the
+        probe's result is recorded.
+        """
+        count, retry_at = self._failures.get(model_id, (0, 0.0))
+        if count < MODEL_FAILURE_THRESHOLD:
+            return False
+        now = time.time()
+        if now < retry_at:
+            return True
+        self._failures[model_id] = (count, now + MODEL_FAILURE_COOLDOWN)
+        return False
+
+    def _record_failure(self, model_id: str) -> None:
+        """Count a failed query, tripping the model once it hits the threshold."""
+        count = self._failures.get(model_id, (0, 0.0))[0] + 1
+        self._failures[model_id] = (count, time.time() + MODEL_FAILURE_COOLDOWN)
+
     async def query_model(
         self,
         model_id: str,
         messages: List[Dict[str, str]],
-        timeout: float = 120.0
+        timeout: float = 120.0,
+        skip_if_failing: bool = True
     ) -> Optional[Dict[str, Any]]:
         """
         Query a model using the appropriate provider.
@@ -187,6 +291,8 @@ class ProviderRegistry:
             model_id: Full model identifier (e.g., "copilot/gpt-4o" or "openai/gpt-4o")
             messages: List of message dicts with 'role' and 'content'
             timeout: Request timeout in seconds
+            skip_if_failing: Return None without a request if the model has
+                failed repeatedly; pass False for models with no fallback
 
         Returns:
             Response dict or None if failed
@@ -195,35 +301,114 @@ class ProviderRegistry:
         provider = self.get(provider_name)
 
         if provider is None:
-            print(f"Unknown provider: {provider_name}")
+            logger.warning("Unknown provider: %s", provider_name)
             return None
 
         if not provider.is_available():
-            print(f"Provider {provider_name} is not available/configured")
+            logger.warning("Provider %s is not available/configured", provider_name)
             return None
 
-        return await provider.query_model(model_name, messages, timeout)
+        if skip_if_failing and self._should_skip(model_id):
+            logger.info("Skipping model %s: failed repeatedly", model_id)
+            return None
+
+        try:
+            async with self._provider_sems[provider_name]:
+                response = await provider.query_model(model_name, messages, timeout)
+        except ProviderUnavailableError as e:
+            # Provider-level problem: don't put the model on cooldown
+            logger.warning("Provider %s could not be used: %s", provider_name, e)
+            return None
+        except Exception:
+            self._record_failure(model_id)
+            raise
+
+        if response is None:
+            self._record_failure(model_id)
+        else:
+            self._failures.pop(model_id, None)
+        return response
 
     async def query_models_parallel(
         self,
         model_ids: List[str],
         messages: List[Dict[str, str]],
-        timeout: float = 120.0
+        timeout: float = 120.0,
+        stage_timeout: Optional[float] = None
     ) -> Dict[str, Optional[Dict[str, Any]]]:
         """
         Query multiple models in parallel.
 
+        If the caller is cancelled (e.g. the client disconnected), or
+        `stage_timeout` elapses, outstanding queries are cancelled rather than
+        left running.
+
         Args:
             model_ids: List of full model identifiers
             messages: List of message dicts to send to each model
             timeout: Request timeout in seconds
+            stage_timeout: Overall deadline in seconds for the whole batch;
+                models still pending at the deadline are reported as None
 
         Returns:
             Dict mapping model identifier to response dict (or None if failed)
         """
-        tasks = [self.query_model(model_id, messages, timeout) for model_id in model_ids]
-        responses = await asyncio.gather(*tasks)
-        return {model_id: response for model_id, response in zip(model_ids, responses)}
+        if not model_ids:
+            # asyncio.wait() rejects an empty set
+            return {}
+
+        tasks = {
+            model_id: asyncio.create_task(self.query_model(model_id, messages, timeout))
+            for model_id in model_ids
+        }
+        try:
+            await asyncio.wait(tasks.values(), timeout=stage_timeout)
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        return {
+            model_id: task.result() if task.done() and not task.cancelled() else None
+            for model_id, task in tasks.items()
+        }
+
+    async def query_models_streaming(
+        self,
+        model_ids: List[str],
+        messages: List[Dict[str, str]],
+        timeout: float = 120.0,
+        stage_timeout: Optional[float] = None
+    ) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """
+        Query multiple models in parallel, yielding each result as it completes.
+
+        Unlike query_models_parallel, callers can act on the fastest models
+        without waiting for the slowest one.
+
+        Args:
+            model_ids: List of full model identifiers
+            messages: List of message dicts to send to each model
+            timeout: Request timeout in seconds
+            stage_timeout: Overall deadline in seconds for the whole batch;
+                models still pending at the deadline are dropped
+
+        Yields:
+            Tuples of (model identifier, response dict or None if failed),
+            in completion order
+        """
+        async def query(model_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+            return model_id, await self.query_model(model_id, messages, timeout)
+
+        tasks = [asyncio.create_task(query(model_id)) for model_id in model_ids]
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=stage_timeout):
+                yield await next_done
+        except asyncio.TimeoutError:
+            logger.warning("Stage deadline of %ss reached, dropping pending models", stage_timeout)
+        finally:
+            # Don't leave queries running if the consumer stops early
+            for task in tasks:
+                task.cancel()
 
     async def query_models_sequential(
         self,
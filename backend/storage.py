@@ -1,11 +1,17 @@
-"""JSON-based storage for conversations."""
+"""Conversation storage: append-only JSONL message logs plus a SQLite metadata index."""
 
 import json
+import logging
 import os
+import sqlite3
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from pathlib import Path
-from .config import DATA_DIR
+from .config import DATA_DIR, INDEX_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+_db: Optional[sqlite3.Connection] = None
 
 
 def ensure_data_dir():
@@ -14,8 +20,88 @@ def ensure_data_dir():
 
 
 def get_conversation_path(conversation_id: str) -> str:
-    """Get the file path for a conversation."""
-    return os.path.join(DATA_DIR, f"{conversation_id}.json")
+    """Get the message log path for a conversation."""
+    return os.path.join(DATA_DIR, f"{conversation_id}.jsonl")
+
+
+def get_db() -> sqlite3.Connection:
+    """
+    Get the metadata index connection, creating the schema on first use.
+
+    Conversations stored in the old one-JSON-file-per-conversation format are
+    migrated the first time the index is opened.
+
+    Returns:
+        Open SQLite connection
+    """
+    global _db
+    if _db is None:
+        ensure_data_dir()
+        Path(INDEX_DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(INDEX_DB_PATH, check_same_thread=False)
+        db.row_factory = sqlite3.Row
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS conversations (
+                id TEXT PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                title TEXT NOT NULL,
+                message_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        db.commit()
+        _migrate_legacy_conversations(db)
+        # Only publish the connection once migration has run
+        _db = db
+    return _db
+
+
+def _migrate_legacy_conversations(db: sqlite3.Connection):
+    """
+    Convert legacy `{id}.json` conversation files to JSONL + index rows.
+
+    Files that can't be read are logged and left in place, so the rest still
+    migrate and the bad ones can be retried after fixing them.
+    """
+    for filename in os.listdir(DATA_DIR):
+        if not filename.endswith('.json'):
+            continue
+        path = os.path.join(DATA_DIR, filename)
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            _save_conversation(db, data)
+        except Exception as e:
+            logger.error("Skipping legacy conversation %s: %s", path, e)
+            continue
+        os.remove(path)
+
+
+def _write_messages(conversation_id: str, messages: List[Dict[str, Any]], mode: str):
+    """Write messages to a conversation's log, one JSON document per line."""
+    with open(get_conversation_path(conversation_id), mode) as f:
+        f.writelines(json.dumps(message) + "\n" for message in messages)
+
+
+def _append_messages(conversation_id: str, messages: List[Dict[str, Any]], title: Optional[str] = None):
+    """
+    Append messages to a conversation and update its index row.
+
+    Args:
+        conversation_id: Conversation identifier
+        messages: Messages to append
+        title: New title for the conversation, or None to keep the current one
+    """
+    # The UPDATE doubles as the existence check; the transaction is rolled
+    # back if appending to the log fails, so the count stays in sync
+    with get_db() as db:
+        cursor = db.execute(
+            "UPDATE conversations SET message_count = message_count + ?, title = COALESCE(?, title) WHERE id = ?",
+            (len(messages), title, conversation_id)
+        )
+        if cursor.rowcount == 0:
+            raise ValueError(f"Conversation {conversation_id} not found")
+
+        _write_messages(conversation_id, messages, 'a')
 
 
 def create_conversation(conversation_id: str) -> Dict[str, Any]:
@@ -28,8 +114,6 @@ def create_conversation(conversation_id: str) -> Dict[str, Any]:
     Returns:
         New conversation dict
     """
-    ensure_data_dir()
-
     conversation = {
         "id": conversation_id,
         "created_at": datetime.utcnow().isoformat(),
@@ -37,14 +121,28 @@ def create_conversation(conversation_id: str) -> Dict[str, Any]:
         "messages": []
     }
 
-    # Save to file
-    path = get_conversation_path(conversation_id)
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
+    save_conversation(conversation)
 
     return conversation
 
 
+def get_conversation_metadata(conversation_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a conversation's metadata from the index, without reading its messages.
+
+    Args:
+        conversation_id: Unique identifier for the conversation
+
+    Returns:
+        Dict with id, created_at, title and message_count, or None if not found
+    """
+    row = get_db().execute(
+        "SELECT id, created_at, title, message_count FROM conversations WHERE id = ?",
+        (conversation_id,)
+    ).fetchone()
+    return dict(row) if row is not None else None
+
+
 def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
     """
     Load a conversation from storage.
@@ -55,27 +153,48 @@ def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Conversation dict or None if not found
     """
-    path = get_conversation_path(conversation_id)
-
-    if not os.path.exists(path):
+    metadata = get_conversation_metadata(conversation_id)
+    if metadata is None:
         return None
 
-    with open(path, 'r') as f:
-        return json.load(f)
+    messages = []
+    path = get_conversation_path(conversation_id)
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            messages = [json.loads(line) for line in f if line.strip()]
+
+    return {
+        "id": metadata["id"],
+        "created_at": metadata["created_at"],
+        "title": metadata["title"],
+        "messages": messages
+    }
 
 
 def save_conversation(conversation: Dict[str, Any]):
     """
-    Save a conversation to storage.
+    Save a conversation to storage, replacing its full message log.
 
     Args:
         conversation: Conversation dict to save
     """
-    ensure_data_dir()
+    _save_conversation(get_db(), conversation)
 
-    path = get_conversation_path(conversation['id'])
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
+
+def _save_conversation(db: sqlite3.Connection, conversation: Dict[str, Any]):
+    """Write a conversation's full message log and index row using `db`."""
+    _write_messages(conversation['id'], conversation["messages"], 'w')
+
+    with db:
+        db.execute(
+            "INSERT OR REPLACE INTO conversations (id, created_at, title, message_count) VALUES (?, ?, ?, ?)",
+            (
+                conversation["id"],
+                conversation["created_at"],
+                conversation.get("title", "New Conversation"),
+                len(conversation["messages"])
+            )
+        )
 
 
 def list_conversations() -> List[Dict[str, Any]]:
@@ -83,28 +202,12 @@ def list_conversations() -> List[Dict[str, Any]]:
     List all conversations (metadata only).
 
     Returns:
-        List of conversation metadata dicts
+        List of conversation metadata dicts, newest first
     """
-    ensure_data_dir()
-
-    conversations = []
-    for filename in os.listdir(DATA_DIR):
-        if filename.endswith('.json'):
-            path = os.path.join(DATA_DIR, filename)
-            with open(path, 'r') as f:
-                data = json.load(f)
-                # Return metadata only
-                conversations.append({
-                    "id": data["id"],
-                    "created_at": data["created_at"],
-                    "title": data.get("title", "New Conversation"),
-                    "message_count": len(data["messages"])
-                })
-
-    # Sort by creation time, newest first
-    conversations.sort(key=lambda x: x["created_at"], reverse=True)
-
-    return conversations
+    rows = get_db().execute(
+        "SELECT id, created_at, title, message_count FROM conversations ORDER BY created_at DESC"
+    ).fetchall()
+    return [dict(row) for row in rows]
 
 
 def add_user_message(conversation_id: str, content: str):
@@ -115,16 +218,10 @@ def add_user_message(conversation_id: str, content: str):
         conversation_id: Conversation identifier
         content: User message content
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
-
-    conversation["messages"].append({
+    _append_messages(conversation_id, [{
         "role": "user",
         "content": content
-    })
-
-    save_conversation(conversation)
+    }])
 
 
 def add_assistant_message(
@@ -142,18 +239,12 @@ def add_assistant_message(
         stage2: List of model rankings
         stage3: Final synthesized response
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
-
-    conversation["messages"].append({
+    _append_messages(conversation_id, [{
         "role": "assistant",
         "stage1": stage1,
         "stage2": stage2,
         "stage3": stage3
-    })
-
-    save_conversation(conversation)
+    }])
 
 
 def update_conversation_title(conversation_id: str, title: str):
@@ -164,9 +255,44 @@ def update_conversation_title(conversation_id: str, title: str):
         conversation_id: Conversation identifier
         title: New title for the conversation
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
+    with get_db() as db:
+        cursor = db.execute(
+            "UPDATE conversations SET title = ? WHERE id = ?",
+            (title, conversation_id)
+        )
+    if cursor.rowcount == 0:
         raise ValueError(f"Conversation {conversation_id} not found")
 
-    conversation["title"] = title
-    save_conversation(conversation)
+
+def commit_turn(
+    conversation_id: str,
+    user_content: str,
+    stage1: List[Dict[str, Any]],
+    stage2: List[Dict[str, Any]],
+    stage3: Dict[str, Any],
+    title: Optional[str] = None
+):
+    """
+    Persist a full user turn (user message, assistant message, optional title)
+    with a single append and a single index update.
+
+    Args:
+        conversation_id: Conversation identifier
+        user_content: User message content
+        stage1: List of individual model responses
+        stage2: List of model rankings
+        stage3: Final synthesized response
+        title: New title for the conversation, or None to keep the current one
+    """
+    _append_messages(conversation_id, [
+        {
+            "role": "user",
+            "content": user_content
+        },
+        {
+            "role": "assistant",
+            "stage1": stage1,
+            "stage2": stage2,
+            "stage3": stage3
+        },
+    ], title=title)
@@ -108,6 +108,19 @@ function App() {
             });
             break;
 
+          case 'stage1_partial':
+            setCurrentConversation((prev) => {
+              const messages = [...prev.messages];
+              const lastMsg = messages[messages.length - 1];
+              // Build a new object: StrictMode runs updaters twice, so appending in place would duplicate
+              messages[messages.length - 1] = {
+                ...lastMsg,
+                stage1: [...(lastMsg.stage1 || []), event.data],
+              };
+              return { ...prev, messages };
+            });
+            break;
+
           case 'stage1_complete':
             setCurrentConversation((prev) => {
               const messages = [...prev.messages];